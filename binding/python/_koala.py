@@ -9,10 +9,12 @@
 # specific language governing permissions and limitations under the License.
 #
 
-import os
 from ctypes import *
-from enum import Enum
-from typing import Sequence
+from enum import IntEnum
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import numpy as np
 
 
 class KoalaError(Exception):
@@ -88,7 +90,25 @@ class Koala(object):
     Python binding for Koala noise-suppression engine.
     """
 
-    class PicovoiceStatuses(Enum):
+    __slots__ = (
+        '_delay_sample',
+        '_delete_func',
+        '_enhanced_scratch',
+        '_enhanced_scratch_ptr',
+        '_frame_length',
+        '_free_error_stack_func',
+        '_get_error_stack_func',
+        '_handle',
+        '_library',
+        '_pad_frame',
+        '_pad_frame_ptr',
+        '_process_func',
+        '_reset_func',
+        '_sample_rate',
+        '_version',
+    )
+
+    class PicovoiceStatuses(IntEnum):
         SUCCESS = 0
         OUT_OF_MEMORY = 1
         IO_ERROR = 2
@@ -135,82 +155,47 @@ class Koala(object):
         if not isinstance(access_key, str) or len(access_key) == 0:
             raise KoalaInvalidArgumentError("`access_key` should be a non-empty string.")
 
-        if not os.path.exists(model_path):
-            raise KoalaIOError("Could not find model file at `%s`." % model_path)
-
-        if not os.path.exists(library_path):
-            raise KoalaIOError("Could not find Koala's dynamic library at `%s`." % library_path)
-
-        library = cdll.LoadLibrary(library_path)
-
-        set_sdk_func = library.pv_set_sdk
-        set_sdk_func.argtypes = [c_char_p]
-        set_sdk_func.restype = None
-
-        set_sdk_func('python'.encode('utf-8'))
+        try:
+            library = _load_library(library_path)
+        except OSError as e:
+            raise KoalaIOError("Could not load Koala's dynamic library at `%s`: %s" % (library_path, e))
 
         self._get_error_stack_func = library.pv_get_error_stack
-        self._get_error_stack_func.argtypes = [POINTER(POINTER(c_char_p)), POINTER(c_int)]
-        self._get_error_stack_func.restype = self.PicovoiceStatuses
-
         self._free_error_stack_func = library.pv_free_error_stack
-        self._free_error_stack_func.argtypes = [POINTER(c_char_p)]
-        self._free_error_stack_func.restype = None
-
-        init_func = library.pv_koala_init
-        init_func.argtypes = [c_char_p, c_char_p, POINTER(POINTER(self.CKoala))]
-        init_func.restype = self.PicovoiceStatuses
 
         self._handle = POINTER(self.CKoala)()
 
-        status = init_func(
+        status = library.pv_koala_init(
             access_key.encode(),
             model_path.encode(),
             byref(self._handle))
-        if status is not self.PicovoiceStatuses.SUCCESS:
+        if status != self.PicovoiceStatuses.SUCCESS:
             raise self._PICOVOICE_STATUS_TO_EXCEPTION[status](
                 message='Initialization failed',
                 message_stack=self._get_error_stack())
 
         self._delete_func = library.pv_koala_delete
-        self._delete_func.argtypes = [POINTER(self.CKoala)]
-        self._delete_func.restype = None
-
-        delay_sample_func = library.pv_koala_delay_sample
-        delay_sample_func.argtypes = [POINTER(self.CKoala), POINTER(c_int32)]
-        delay_sample_func.restype = self.PicovoiceStatuses
-        delay_sample = c_int32()
-        status = delay_sample_func(self._handle, delay_sample)
-        if status is not self.PicovoiceStatuses.SUCCESS:
-            self.delete()
-            raise self._PICOVOICE_STATUS_TO_EXCEPTION[status](
-                message='Failed to get delay samples',
-                message_stack=self._get_error_stack())
 
-        self._delay_sample = delay_sample.value
+        self._delay_sample = None
 
         self._process_func = library.pv_koala_process
-        self._process_func.argtypes = [
-            POINTER(self.CKoala),
-            POINTER(c_short),
-            POINTER(c_short),
-        ]
-        self._process_func.restype = self.PicovoiceStatuses
 
         self._reset_func = library.pv_koala_reset
-        self._reset_func.argtypes = [POINTER(self.CKoala)]
-        self._reset_func.restype = self.PicovoiceStatuses
 
         self._sample_rate = library.pv_sample_rate()
 
         self._frame_length = library.pv_koala_frame_length()
 
-        version_func = library.pv_koala_version
-        version_func.argtypes = []
-        version_func.restype = c_char_p
-        self._version = version_func().decode('utf-8')
+        self._enhanced_scratch = np.empty(self._frame_length, dtype=np.int16)
+        self._enhanced_scratch_ptr = self._enhanced_scratch.ctypes.data_as(POINTER(c_short))
+        self._pad_frame = np.empty(self._frame_length, dtype=np.int16)
+        self._pad_frame_ptr = self._pad_frame.ctypes.data_as(POINTER(c_short))
+
+        self._version = None
 
-    def process(self, pcm: Sequence[int]) -> Sequence[int]:
+        self._library = library
+
+    def process(self, pcm: Sequence[int], out: Optional[np.ndarray] = None) -> Sequence[int]:
         """
         Processes a frame of audio and returns delayed enhanced audio.
 
@@ -218,6 +203,12 @@ class Koala(object):
         `.frame_length`. The incoming audio needs to have a sample rate equal to `.sample_rate` and be 16-bit
         linearly-encoded. Koala operates on single-channel audio. Consecutive calls to `.process()` must provide
         consecutive frames of audio from the same source, unless `.reset()` has been called in between.
+        The GIL is released while the engine runs, so independent `Koala` instances may process concurrently from
+        separate threads; a single instance must not be shared between threads.
+
+        :param out: Optional writable, C-contiguous int16 array of `.frame_length` samples that the enhanced audio is
+        written into, allowing allocation-free streaming; when omitted, a fresh array is allocated and returned.
+        The output buffer must not overlap the input frame.
 
         :return: A frame of enhanced audio samples, stored as a sequence of 16-bit linearly-encoded integers.
         The output is not directly the enhanced version of the input PCM, but corresponds to samples that were given in
@@ -225,22 +216,101 @@ class Koala(object):
         time of the output frame can be attained from `.delay_sample`.
         """
 
-        if len(pcm) != self.frame_length:
-            raise KoalaInvalidArgumentError(
-                "Length of input frame %d does not match required frame length %d" % (len(pcm), self.frame_length))
+        pcm = self._as_pcm_array(pcm)
 
-        frame_type = c_short * self.frame_length
-        pcm = frame_type(*pcm)
-        enhanced_pcm = frame_type()
-
-        status = self._process_func(self._handle, pcm, enhanced_pcm)
-        if status is not self.PicovoiceStatuses.SUCCESS:
-            raise self._PICOVOICE_STATUS_TO_EXCEPTION[status](
+        if pcm.shape[0] != self._frame_length:
+            raise KoalaInvalidArgumentError(
+                "Length of input frame %d does not match required frame length %d" % (pcm.shape[0], self._frame_length))
+
+        if out is None:
+            enhanced_pcm = np.empty_like(self._enhanced_scratch)
+        else:
+            if not isinstance(out, np.ndarray) or out.dtype != np.int16 or out.ndim != 1 or \
+                    not out.flags['C_CONTIGUOUS'] or not out.flags['WRITEABLE']:
+                raise KoalaInvalidArgumentError("`out` must be a writable C-contiguous array of int16 samples")
+            if out.shape[0] != self._frame_length:
+                raise KoalaInvalidArgumentError(
+                    "Length of output frame %d does not match required frame length %d" % (
+                        out.shape[0], self._frame_length))
+            enhanced_pcm = out
+
+        status = self._process_func(
+            self._handle,
+            pcm.ctypes.data_as(POINTER(c_short)),
+            enhanced_pcm.ctypes.data_as(POINTER(c_short)))
+        if status != 0:
+            raise self._PICOVOICE_STATUS_TO_EXCEPTION[self.PicovoiceStatuses(status)](
                 message='Processing failed',
                 message_stack=self._get_error_stack())
 
-        # noinspection PyTypeChecker
-        return list(enhanced_pcm)
+        return enhanced_pcm
+
+    def process_complete(self, pcm: Sequence[int]) -> Sequence[int]:
+        """
+        Processes an entire stream of audio and returns the enhanced version, compensating for the delay.
+        The engine is reset before processing, so the input is treated as a complete recording rather than a
+        continuation of previous calls to `.process()`.
+
+        :param pcm: Audio samples with a sample rate equal to `.sample_rate`, 16-bit linearly-encoded and
+        single-channel.
+
+        :return: Enhanced audio samples, stored as a sequence of 16-bit linearly-encoded integers. The output has the
+        same length as the input and is aligned with it, i.e., the delay given by `.delay_sample` is removed.
+        """
+
+        pcm = self._as_pcm_array(pcm)
+        input_length = pcm.shape[0]
+        frame_length = self._frame_length
+        delay_sample = self.delay_sample
+
+        self.reset()
+
+        result = np.empty(input_length, dtype=np.int16)
+        enhanced_frame = self._enhanced_scratch
+        process_func = self._process_func
+        handle = self._handle
+        out_ptr = self._enhanced_scratch_ptr
+
+        num_full_frames = input_length // frame_length
+        num_frames = -(-(input_length + delay_sample) // frame_length)
+
+        for i in range(num_full_frames):
+            start_sample = i * frame_length
+            input_ptr = pcm[start_sample:start_sample + frame_length].ctypes.data_as(POINTER(c_short))
+            status = process_func(handle, input_ptr, out_ptr)
+            if status != 0:
+                raise self._PICOVOICE_STATUS_TO_EXCEPTION[self.PicovoiceStatuses(status)](
+                    message='Processing failed',
+                    message_stack=self._get_error_stack())
+
+            frame_start = start_sample - delay_sample
+            lo = max(frame_start, 0)
+            hi = min(frame_start + frame_length, input_length)
+            if hi > lo:
+                result[lo:hi] = enhanced_frame[lo - frame_start:hi - frame_start]
+
+        num_tail = input_length - num_full_frames * frame_length
+        self._pad_frame[:num_tail] = pcm[input_length - num_tail:]
+        self._pad_frame[num_tail:] = 0
+
+        for i in range(num_full_frames, num_frames):
+            status = process_func(handle, self._pad_frame_ptr, out_ptr)
+            if status != 0:
+                raise self._PICOVOICE_STATUS_TO_EXCEPTION[self.PicovoiceStatuses(status)](
+                    message='Processing failed',
+                    message_stack=self._get_error_stack())
+
+            if num_tail != 0:
+                self._pad_frame[:num_tail] = 0
+                num_tail = 0
+
+            frame_start = i * frame_length - delay_sample
+            lo = max(frame_start, 0)
+            hi = min(frame_start + frame_length, input_length)
+            if hi > lo:
+                result[lo:hi] = enhanced_frame[lo - frame_start:hi - frame_start]
+
+        return result
 
     def reset(self) -> None:
         """
@@ -249,15 +319,17 @@ class Koala(object):
         """
 
         status = self._reset_func(self._handle)
-        if status is not self.PicovoiceStatuses.SUCCESS:
-            raise self._PICOVOICE_STATUS_TO_EXCEPTION[status](
+        if status != 0:
+            raise self._PICOVOICE_STATUS_TO_EXCEPTION[self.PicovoiceStatuses(status)](
                 message='Reset failed',
                 message_stack=self._get_error_stack())
 
     def delete(self) -> None:
-        """Releases resources acquired by Koala."""
+        """Releases resources acquired by Koala. Safe to call more than once."""
 
-        self._delete_func(self._handle)
+        if self._handle:
+            self._delete_func(self._handle)
+            self._handle = POINTER(self.CKoala)()
 
     @property
     def sample_rate(self) -> int:
@@ -277,30 +349,101 @@ class Koala(object):
         Delay in samples. If the input and output of consecutive calls to `.process()` are viewed as two contiguous
         streams of audio data, this delay specifies the time shift between the input and output stream."""
 
+        if self._delay_sample is None:
+            delay_sample = c_int32()
+            status = self._library.pv_koala_delay_sample(self._handle, byref(delay_sample))
+            if status != self.PicovoiceStatuses.SUCCESS:
+                raise self._PICOVOICE_STATUS_TO_EXCEPTION[status](
+                    message='Failed to get delay samples',
+                    message_stack=self._get_error_stack())
+            self._delay_sample = delay_sample.value
+
         return self._delay_sample
 
     @property
     def version(self) -> str:
         """Version."""
 
+        if self._version is None:
+            self._version = self._library.pv_koala_version().decode('utf-8')
+
         return self._version
 
+    @staticmethod
+    def _as_pcm_array(pcm: Sequence[int]) -> np.ndarray:
+        if isinstance(pcm, (bytes, bytearray, memoryview)):
+            try:
+                pcm = np.frombuffer(pcm, dtype=np.int16)
+            except ValueError as e:
+                raise KoalaInvalidArgumentError("`pcm` is not a valid buffer of 16-bit samples: %s" % e)
+        else:
+            pcm = np.asarray(pcm)
+        if pcm.ndim != 1:
+            raise KoalaInvalidArgumentError("`pcm` must be one-dimensional, got %d dimensions" % pcm.ndim)
+        if not np.issubdtype(pcm.dtype, np.integer):
+            raise KoalaInvalidArgumentError("`pcm` must consist of 16-bit integer samples, got `%s`" % pcm.dtype)
+        if pcm.dtype != np.int16 or not pcm.flags['C_CONTIGUOUS']:
+            pcm = np.ascontiguousarray(pcm, dtype=np.int16)
+        return pcm
+
     def _get_error_stack(self) -> Sequence[str]:
         message_stack_ref = POINTER(c_char_p)()
         message_stack_depth = c_int()
         status = self._get_error_stack_func(byref(message_stack_ref), byref(message_stack_depth))
-        if status is not self.PicovoiceStatuses.SUCCESS:
+        if status != self.PicovoiceStatuses.SUCCESS:
             raise self._PICOVOICE_STATUS_TO_EXCEPTION[status](message='Unable to get Koala error state')
 
-        message_stack = list()
-        for i in range(message_stack_depth.value):
-            message_stack.append(message_stack_ref[i].decode('utf-8'))
+        message_stack = [_decode_message(message_stack_ref[i]) for i in range(message_stack_depth.value)]
 
         self._free_error_stack_func(message_stack_ref)
 
         return message_stack
 
 
+@lru_cache(maxsize=128)
+def _decode_message(message: bytes) -> str:
+    return message.decode('utf-8')
+
+
+@lru_cache(maxsize=None)
+def _load_library(library_path: str) -> CDLL:
+    library = cdll.LoadLibrary(library_path)
+
+    library.pv_set_sdk.argtypes = [c_char_p]
+    library.pv_set_sdk.restype = None
+    library.pv_set_sdk('python'.encode('utf-8'))
+
+    library.pv_get_error_stack.argtypes = [POINTER(POINTER(c_char_p)), POINTER(c_int)]
+    library.pv_get_error_stack.restype = Koala.PicovoiceStatuses
+
+    library.pv_free_error_stack.argtypes = [POINTER(c_char_p)]
+    library.pv_free_error_stack.restype = None
+
+    library.pv_koala_init.argtypes = [c_char_p, c_char_p, POINTER(POINTER(Koala.CKoala))]
+    library.pv_koala_init.restype = Koala.PicovoiceStatuses
+
+    library.pv_koala_delete.argtypes = [POINTER(Koala.CKoala)]
+    library.pv_koala_delete.restype = None
+
+    library.pv_koala_delay_sample.argtypes = [POINTER(Koala.CKoala), POINTER(c_int32)]
+    library.pv_koala_delay_sample.restype = Koala.PicovoiceStatuses
+
+    library.pv_koala_process.argtypes = [
+        POINTER(Koala.CKoala),
+        POINTER(c_short),
+        POINTER(c_short),
+    ]
+    library.pv_koala_process.restype = c_int
+
+    library.pv_koala_reset.argtypes = [POINTER(Koala.CKoala)]
+    library.pv_koala_reset.restype = c_int
+
+    library.pv_koala_version.argtypes = []
+    library.pv_koala_version.restype = c_char_p
+
+    return library
+
+
 __all__ = [
     'Koala',
     'KoalaActivationError',
@@ -11,13 +11,14 @@
 
 import os
 import platform
-import subprocess
+from functools import lru_cache
 
 
 def _is_64bit():
     return '64bit' in platform.architecture()[0]
 
 
+@lru_cache(maxsize=None)
 def _linux_machine() -> str:
     machine = platform.machine()
     if machine == 'x86_64':
@@ -29,7 +30,8 @@ def _linux_machine() -> str:
 
     cpu_info = ''
     try:
-        cpu_info = subprocess.check_output(['cat', '/proc/cpuinfo']).decode('utf-8')
+        with open('/proc/cpuinfo') as f:
+            cpu_info = f.read()
         cpu_part_list = [x for x in cpu_info.split('\n') if 'CPU part' in x]
         cpu_part = cpu_part_list[0].split(' ')[-1].lower()
     except Exception as e:
@@ -56,6 +58,7 @@ _RASPBERRY_PI_MACHINES = {
     "cortex-a76-aarch64"}
 
 
+@lru_cache(maxsize=None)
 def default_library_path(relative: str = '') -> str:
     if platform.system() == 'Darwin':
         if platform.machine() == 'x86_64':
@@ -77,6 +80,7 @@ def default_library_path(relative: str = '') -> str:
     raise NotImplementedError('Unsupported platform.')
 
 
+@lru_cache(maxsize=None)
 def default_model_path(relative: str = '') -> str:
     return os.path.join(os.path.dirname(__file__), relative, 'lib/common/koala_params.pv')
 
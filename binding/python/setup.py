@@ -17,7 +17,12 @@ import setuptools
 INCLUDE_FILES = ('../../LICENSE', '__init__.py', '_factory.py', '_koala.py', '_util.py')
 INCLUDE_LIBS = ('common', 'linux', 'mac', 'raspberry-pi', 'windows')
 
-os.system('git clean -dfx')
+for artifact in ('pvkoala', 'build', 'dist', 'pvkoala.egg-info', 'MANIFEST.in'):
+    artifact_path = os.path.join(os.path.dirname(__file__), artifact)
+    if os.path.isdir(artifact_path):
+        shutil.rmtree(artifact_path)
+    elif os.path.exists(artifact_path):
+        os.remove(artifact_path)
 
 package_folder = os.path.join(os.path.dirname(__file__), 'pvkoala')
 os.mkdir(package_folder)
@@ -59,6 +64,7 @@ setuptools.setup(
         "Programming Language :: Python :: 3",
         "Topic :: Multimedia :: Sound/Audio :: Speech"
     ],
+    install_requires=["numpy"],
     python_requires='>=3.8',
     keywords="Noise Cancellation, Noise Suppression, Noise Removal, Speech Enhancement, Speech Denoising",
 )
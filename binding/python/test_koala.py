@@ -9,16 +9,16 @@
 #    specific language governing permissions and limitations under the License.
 #
 import argparse
-import math
 import os
-import struct
 import sys
 import unittest
-import wave
 from typing import Optional, Sequence
 
-from _koala import Koala, KoalaError
+import numpy as np
+
+from _koala import Koala, KoalaError, KoalaInvalidArgumentError
 from _util import default_library_path, default_model_path
+from test_util import load_wav_resource
 
 
 class KoalaTestCase(unittest.TestCase):
@@ -30,16 +30,10 @@ class KoalaTestCase(unittest.TestCase):
     noise_pcm: Sequence[int]
     koala: Koala
 
-    @staticmethod
-    def load_wav_resource(path: str) -> Sequence[int]:
-        with wave.open(path, 'rb') as f:
-            buffer = f.readframes(f.getnframes())
-            return struct.unpack('%dh' % f.getnframes(), buffer)
-
     @classmethod
     def setUpClass(cls) -> None:
-        cls.test_pcm = cls.load_wav_resource(cls.AUDIO_PATH)
-        cls.noise_pcm = cls.load_wav_resource(cls.NOISE_PATH)
+        cls.test_pcm = load_wav_resource(cls.AUDIO_PATH)
+        cls.noise_pcm = load_wav_resource(cls.NOISE_PATH)
 
         cls.koala = Koala(
             access_key=cls.access_key,
@@ -54,10 +48,8 @@ class KoalaTestCase(unittest.TestCase):
 
     @staticmethod
     def _pcm_root_mean_square(pcm: Sequence[int]) -> float:
-        sum_of_squares = 0
-        for x in pcm:
-            sum_of_squares += (x / 32768.0) ** 2
-        return math.sqrt(sum_of_squares / len(pcm))
+        pcm = np.asarray(pcm, dtype=np.float32)
+        return float(np.sqrt(np.dot(pcm, pcm) / pcm.size) / 32768.0)
 
     def _run_test(
             self,
@@ -68,16 +60,32 @@ class KoalaTestCase(unittest.TestCase):
         frame_length = self.koala.frame_length
         delay_sample = self.koala.delay_sample
 
+        num_frames = num_samples // frame_length
+        input_frames = np.asarray(input_pcm)[:num_frames * frame_length].reshape(num_frames, frame_length)
+
+        first_reference_frame = num_frames
+        reference_rms = None
+        if reference_pcm is not None:
+            first_reference_frame = -(-delay_sample // frame_length)
+            if first_reference_frame < num_frames:
+                reference = np.asarray(reference_pcm, dtype=np.float32)
+                reference_frames = np.lib.stride_tricks.as_strided(
+                    reference[first_reference_frame * frame_length - delay_sample:],
+                    shape=(num_frames - first_reference_frame, frame_length),
+                    strides=(frame_length * reference.itemsize, reference.itemsize))
+                reference_rms = np.sqrt(np.mean(reference_frames * reference_frames, axis=1)) / 32768.0
+
+        process = self.koala.process
+
         self.koala.reset()
-        for frame_start in range(0, num_samples - frame_length + 1, frame_length):
-            enhanced_frame = self.koala.process(input_pcm[frame_start:frame_start + frame_length])
+        for i, input_frame in enumerate(input_frames):
+            enhanced_frame = process(input_frame)
 
             frame_energy = self._pcm_root_mean_square(enhanced_frame)
-            if reference_pcm is None or frame_start < delay_sample:
+            if i < first_reference_frame:
                 energy_deviation = frame_energy
             else:
-                reference_frame = reference_pcm[frame_start - delay_sample:frame_start - delay_sample + frame_length]
-                energy_deviation = abs(frame_energy - self._pcm_root_mean_square(reference_frame))
+                energy_deviation = abs(frame_energy - reference_rms[i - first_reference_frame])
 
             self.assertLess(energy_deviation, tolerance)
 
@@ -88,23 +96,73 @@ class KoalaTestCase(unittest.TestCase):
         self._run_test(self.noise_pcm, tolerance=0.02)
 
     def test_mixed(self) -> None:
-        noisy_pcm = [x + y for x, y in zip(self.test_pcm, self.noise_pcm)]
+        num_samples = min(len(self.test_pcm), len(self.noise_pcm))
+        noisy_pcm = np.clip(
+            self.test_pcm[:num_samples].astype(np.int32) + self.noise_pcm[:num_samples].astype(np.int32),
+            -32768,
+            32767).astype(np.int16)
         self._run_test(noisy_pcm, self.test_pcm, tolerance=0.02)
 
     def test_reset(self) -> None:
         frame_length = self.koala.frame_length
+        process = self.koala.process
         reference_frames = []
 
         self.koala.reset()
         for frame_start in range(0, len(self.test_pcm) - frame_length + 1, frame_length):
             input_frame = self.test_pcm[frame_start:frame_start + frame_length]
-            reference_frames.append(self.koala.process(input_frame))
+            reference_frames.append(process(input_frame))
 
         self.koala.reset()
-        for frame_start in range(0, len(self.test_pcm) - frame_length + 1, frame_length):
+        for i, frame_start in enumerate(range(0, len(self.test_pcm) - frame_length + 1, frame_length)):
             input_frame = self.test_pcm[frame_start:frame_start + frame_length]
+            output_frame = process(input_frame)
+            self.assertTrue(np.array_equal(output_frame, reference_frames[i]))
+
+    def test_process_complete(self) -> None:
+        enhanced_pcm = self.koala.process_complete(self.test_pcm)
+        self.assertEqual(len(enhanced_pcm), len(self.test_pcm))
+
+        frame_length = self.koala.frame_length
+        delay_sample = self.koala.delay_sample
+        num_samples = len(self.test_pcm)
+
+        reference_pcm = np.empty(num_samples, dtype=np.int16)
+        self.koala.reset()
+        start_sample = 0
+        while start_sample < num_samples + delay_sample:
+            input_frame = self.test_pcm[start_sample:start_sample + frame_length]
+            if len(input_frame) < frame_length:
+                input_frame = np.pad(input_frame, (0, frame_length - len(input_frame)))
             output_frame = self.koala.process(input_frame)
-            self.assertTrue(all(x == y for x, y in zip(output_frame, reference_frames.pop(0))))
+
+            frame_start = start_sample - delay_sample
+            lo = max(frame_start, 0)
+            hi = min(frame_start + frame_length, num_samples)
+            if hi > lo:
+                reference_pcm[lo:hi] = output_frame[lo - frame_start:hi - frame_start]
+
+            start_sample += frame_length
+
+        self.assertTrue(np.array_equal(enhanced_pcm, reference_pcm))
+
+    def test_process_out(self) -> None:
+        input_frame = self.test_pcm[:self.koala.frame_length]
+
+        self.koala.reset()
+        reference_frame = self.koala.process(input_frame)
+
+        out = np.empty(self.koala.frame_length, dtype=np.int16)
+        self.koala.reset()
+        output_frame = self.koala.process(input_frame, out=out)
+        self.assertIs(output_frame, out)
+        self.assertTrue(np.array_equal(out, reference_frame))
+
+        with self.assertRaises(KoalaInvalidArgumentError):
+            self.koala.process(input_frame, out=np.empty(self.koala.frame_length, dtype=np.float32))
+
+        with self.assertRaises(KoalaInvalidArgumentError):
+            self.koala.process(input_frame, out=np.empty(self.koala.frame_length - 1, dtype=np.int16))
 
     def test_version(self) -> None:
         version = self.koala.version
@@ -11,14 +11,13 @@
 
 import argparse
 import os
-import struct
 import sys
 import unittest
-import wave
 from time import perf_counter
 
 from _koala import Koala
 from _util import default_library_path, default_model_path
+from test_util import load_wav_resource
 
 
 class KoalaPerformanceTestCase(unittest.TestCase):
@@ -29,23 +28,23 @@ class KoalaPerformanceTestCase(unittest.TestCase):
     proc_performance_threshold_sec: float
 
     def test_performance_proc(self) -> None:
-        with wave.open(self.AUDIO_PATH, 'rb') as f:
-            buffer = f.readframes(f.getnframes())
-            pcm = struct.unpack('%dh' % (len(buffer) / struct.calcsize('h')), buffer)
+        pcm = load_wav_resource(self.AUDIO_PATH)
 
         koala = Koala(
             access_key=self.access_key,
             library_path=default_library_path('../..'),
             model_path=default_model_path('../..'))
 
-        num_frames = len(pcm) // koala.frame_length
+        frame_length = koala.frame_length
+        process = koala.process
+        num_frames = len(pcm) // frame_length
 
         perf_results = list()
         for i in range(self.num_test_iterations + 1):
             start = perf_counter()
             for j in range(num_frames):
-                frame = pcm[j * koala.frame_length:(j + 1) * koala.frame_length]
-                koala.process(frame)
+                frame = pcm[j * frame_length:(j + 1) * frame_length]
+                process(frame)
 
             if i > 0:
                 perf_results.append(perf_counter() - start)
@@ -0,0 +1,24 @@
+#
+#    Copyright 2024 Picovoice Inc.
+#
+#    You may not use this file except in compliance with the license. A copy of the license is located in the "LICENSE"
+#    file accompanying this source.
+#
+#    Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+#    an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+#    specific language governing permissions and limitations under the License.
+#
+
+import wave
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def load_wav_resource(path: str) -> np.ndarray:
+    with wave.open(path, 'rb') as f:
+        return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+
+
+__all__ = ['load_wav_resource']
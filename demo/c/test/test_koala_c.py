@@ -23,6 +23,14 @@ class KoalaCTestCase(unittest.TestCase):
         cls._platform = sys.argv[2]
         cls._arch = "" if len(sys.argv) != 4 else sys.argv[3]
         cls._root_dir = os.path.join(os.path.dirname(__file__), "../../..")
+        cls._model_path = os.path.join(cls._root_dir, 'lib/common/koala_params.pv')
+        cls._library_file = os.path.join(
+            cls._root_dir,
+            "lib",
+            cls._platform,
+            cls._arch,
+            "libpv_koala." + cls._get_lib_ext(cls._platform)
+        )
 
     @staticmethod
     def _get_lib_ext(platform):
@@ -33,18 +41,6 @@ class KoalaCTestCase(unittest.TestCase):
         else:
             return "so"
 
-    def _get_model_path(self):
-        return os.path.join(self._root_dir, 'lib/common/koala_params.pv')
-
-    def _get_library_file(self):
-        return os.path.join(
-            self._root_dir,
-            "lib",
-            self._platform,
-            self._arch,
-            "libpv_koala." + self._get_lib_ext(self._platform)
-        )
-
     def _get_audio_file(self, audio_file_name):
         return os.path.join(self._root_dir, 'resources/audio_samples', audio_file_name)
 
@@ -52,16 +48,15 @@ class KoalaCTestCase(unittest.TestCase):
         args = [
             os.path.join(os.path.dirname(__file__), "../build/koala_demo_file"),
             "-a", self._access_key,
-            "-l", self._get_library_file(),
-            "-m", self._get_model_path(),
+            "-l", self._library_file,
+            "-m", self._model_path,
             "-i", self._get_audio_file(audio_file_name),
             "-o", os.path.join(os.path.dirname(__file__), "output.wav")
         ]
-        process = subprocess.Popen(args, stderr=subprocess.PIPE, stdout=subprocess.PIPE)
-        stdout, stderr = process.communicate()
-        self.assertEqual(process.poll(), 0)
-        self.assertEqual(stderr.decode('utf-8'), '')
-        self.assertTrue("Real time factor" in stdout.decode('utf-8'))
+        process = subprocess.run(args, stderr=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual(process.stderr.decode('utf-8'), '')
+        self.assertIn(b"Real time factor", process.stdout)
 
     def test_koala(self):
         self.run_koala("test.wav")
@@ -10,12 +10,83 @@
 #
 
 import argparse
-import struct
+import os
 import wave
 
+import numpy as np
+
 from pvkoala import create, KoalaActivationLimitError
 
 PROGRESS_BAR_LENGTH = 30
+PROGRESS_BARS = ['#' * i + ' ' * (PROGRESS_BAR_LENGTH - i) for i in range(PROGRESS_BAR_LENGTH + 1)]
+
+
+def denoise(koala, input_path, output_path):
+    num_samples_written = 0
+    try:
+        with wave.open(input_path, 'rb') as input_file:
+            sample_rate = input_file.getframerate()
+            num_channels = input_file.getnchannels()
+            sample_width = input_file.getsampwidth()
+            input_length = input_file.getnframes()
+
+            if sample_rate != koala.sample_rate:
+                raise ValueError('Invalid sample rate of `%d`. Koala only accepts `%d`' % (
+                    sample_rate,
+                    koala.sample_rate))
+            if num_channels != 1:
+                raise ValueError('This demo can only process single-channel WAV files')
+            if sample_width != 2:
+                raise ValueError('This demo can only process WAV files with 16-bit PCM encoding')
+            pcm = np.frombuffer(input_file.readframes(input_length), dtype=np.int16)
+
+            with wave.open(output_path, 'wb') as output_file:
+                output_file.setnchannels(1)
+                output_file.setsampwidth(2)
+                output_file.setframerate(koala.sample_rate)
+
+                enhanced_pcm = np.empty(input_length, dtype=np.int16)
+                pad_frame = np.zeros(koala.frame_length, dtype=np.int16)
+                last_percentage = -1
+
+                koala.reset()
+                try:
+                    start_sample = 0
+                    while start_sample < input_length + koala.delay_sample:
+                        end_sample = start_sample + koala.frame_length
+
+                        input_frame = pcm[start_sample:end_sample]
+                        if len(input_frame) < koala.frame_length:
+                            pad_frame[:len(input_frame)] = input_frame
+                            pad_frame[len(input_frame):] = 0
+                            input_frame = pad_frame
+
+                        output_frame = koala.process(input_frame)
+
+                        lo = max(0, koala.delay_sample - start_sample)
+                        hi = min(koala.frame_length, input_length + koala.delay_sample - start_sample)
+                        if lo < hi:
+                            enhanced_pcm[num_samples_written:num_samples_written + hi - lo] = output_frame[lo:hi]
+                            num_samples_written += hi - lo
+
+                        start_sample = end_sample
+                        progress = min(start_sample / (input_length + koala.delay_sample), 1.0)
+                        percentage = int(progress * 100)
+                        if percentage != last_percentage:
+                            last_percentage = percentage
+                            bar_length = int(progress * PROGRESS_BAR_LENGTH)
+                            print(
+                                '\r[%3d%%]|%s|' % (percentage, PROGRESS_BARS[bar_length]),
+                                end='',
+                                flush=True)
+                finally:
+                    output_file.writeframes(enhanced_pcm[:num_samples_written].tobytes())
+
+                print()
+    finally:
+        if num_samples_written > 0:
+            print('%.2f seconds of audio have been written to %s.' % (
+                num_samples_written / koala.sample_rate, output_path))
 
 
 def main():
@@ -26,12 +97,16 @@ def main():
         help='AccessKey obtained from Picovoice Console (https://console.picovoice.ai/)')
     parser.add_argument(
         '--input_path',
-        required=True,
         help='Absolute path to .wav file with the input audio to be enhanced')
     parser.add_argument(
         '--output_path',
-        required=True,
         help='Absolute path to .wav file where the enhanced audio will be stored')
+    parser.add_argument(
+        '--input_dir',
+        help='Absolute path to a directory with .wav files to be enhanced; an alternative to --input_path')
+    parser.add_argument(
+        '--output_dir',
+        help='Absolute path to a directory where the enhanced audio will be stored, one .wav per input file')
     parser.add_argument(
         '--library_path',
         help='Absolute path to dynamic library. Default: using the library provided by `pvkoala`')
@@ -40,81 +115,55 @@ def main():
         help='Absolute path to Koala model. Default: using the model provided by `pvkoala`')
     args = parser.parse_args()
 
-    if not args.input_path.lower().endswith('.wav'):
-        raise ValueError('Given argument --input_path must have WAV file extension')
+    if (args.input_path is None) == (args.input_dir is None):
+        raise ValueError('Provide exactly one of --input_path and --input_dir')
+
+    if args.input_path is not None:
+        if args.output_path is None:
+            raise ValueError('Given argument --input_path requires --output_path')
+
+        if not args.input_path.lower().endswith('.wav'):
+            raise ValueError('Given argument --input_path must have WAV file extension')
+
+        if not args.output_path.lower().endswith('.wav'):
+            raise ValueError('Given argument --output_path must have WAV file extension')
+
+        if args.input_path == args.output_path:
+            raise ValueError('This demo cannot overwrite its input path')
 
-    if not args.output_path.lower().endswith('.wav'):
-        raise ValueError('Given argument --output_path must have WAV file extension')
+        jobs = [(args.input_path, args.output_path)]
+    else:
+        if args.output_dir is None:
+            raise ValueError('Given argument --input_dir requires --output_dir')
 
-    if args.input_path == args.output_path:
-        raise ValueError('This demo cannot overwrite its input path')
+        if os.path.abspath(args.input_dir) == os.path.abspath(args.output_dir):
+            raise ValueError('This demo cannot overwrite its input directory')
+
+        wav_names = sorted(x for x in os.listdir(args.input_dir) if x.lower().endswith('.wav'))
+        if len(wav_names) == 0:
+            raise ValueError('No .wav files found in `%s`' % args.input_dir)
+
+        os.makedirs(args.output_dir, exist_ok=True)
+        jobs = [(os.path.join(args.input_dir, x), os.path.join(args.output_dir, x)) for x in wav_names]
 
     koala = create(
         access_key=args.access_key,
         model_path=args.model_path,
         library_path=args.library_path)
 
-    length_sec = 0.0
     try:
         print('Koala version: %s' % koala.version)
 
-        with wave.open(args.input_path, 'rb') as input_file:
-            if input_file.getframerate() != koala.sample_rate:
-                raise ValueError('Invalid sample rate of `%d`. Koala only accepts `%d`' % (
-                    input_file.getframerate(),
-                    koala.sample_rate))
-            if input_file.getnchannels() != 1:
-                raise ValueError('This demo can only process single-channel WAV files')
-            if input_file.getsampwidth() != 2:
-                raise ValueError('This demo can only process WAV files with 16-bit PCM encoding')
-            input_length = input_file.getnframes()
-
-            with wave.open(args.output_path, 'wb') as output_file:
-                output_file.setnchannels(1)
-                output_file.setsampwidth(2)
-                output_file.setframerate(koala.sample_rate)
-
-                start_sample = 0
-                while start_sample < input_length + koala.delay_sample:
-                    end_sample = start_sample + koala.frame_length
-
-                    frame_buffer = input_file.readframes(koala.frame_length)
-                    num_samples_read = len(frame_buffer) // struct.calcsize('h')
-                    input_frame = struct.unpack('%dh' % num_samples_read, frame_buffer)
-                    if num_samples_read < koala.frame_length:
-                        input_frame = input_frame + (0,) * (koala.frame_length - num_samples_read)
-
-                    output_frame = koala.process(input_frame)
-
-                    if end_sample > koala.delay_sample:
-                        if end_sample > input_length + koala.delay_sample:
-                            output_frame = output_frame[:input_length + koala.delay_sample - start_sample]
-                        if start_sample < koala.delay_sample:
-                            output_frame = output_frame[koala.delay_sample - start_sample:]
-                        output_file.writeframes(struct.pack('%dh' % len(output_frame), *output_frame))
-                        length_sec += len(output_frame) / koala.sample_rate
-
-                    start_sample = end_sample
-                    progress = start_sample / (input_length + koala.delay_sample)
-                    bar_length = int(progress * PROGRESS_BAR_LENGTH)
-                    print(
-                        '\r[%3d%%]|%s%s|' % (
-                            progress * 100,
-                            '#' * bar_length,
-                            ' ' * (PROGRESS_BAR_LENGTH - bar_length)),
-                        end='',
-                        flush=True)
-
-                print()
+        for input_path, output_path in jobs:
+            if len(jobs) > 1:
+                print(os.path.basename(input_path))
+            denoise(koala, input_path, output_path)
 
     except KeyboardInterrupt:
         print()
     except KoalaActivationLimitError:
         print('AccessKey has reached its processing limit')
     finally:
-        if length_sec > 0:
-            print('%.2f seconds of audio have been written to %s.' % (length_sec, args.output_path))
-
         koala.delete()
 
 
@@ -12,14 +12,20 @@
 import argparse
 import contextlib
 import math
-import struct
+import queue
+import threading
 import wave
 
+import numpy as np
+
 from pvkoala import create, KoalaActivationLimitError
 from pvrecorder import PvRecorder
 
 VU_DYNAMIC_RANGE_DB = 50.0
+VU_LOG_SCALE = 10.0 / (math.log(10.0) * VU_DYNAMIC_RANGE_DB)
 VU_MAX_BAR_LENGTH = 30
+VU_BARS = ['#' * i + ' ' * (VU_MAX_BAR_LENGTH - i) for i in range(VU_MAX_BAR_LENGTH + 1)]
+VU_UPDATE_INTERVAL_FRAMES = 3
 
 
 def main():
@@ -65,7 +71,7 @@ def main():
         model_path=args.model_path,
         library_path=args.library_path)
 
-    length_sec = 0.0
+    num_samples_written = 0
     try:
         print('Koala version: %s' % koala.version)
 
@@ -73,41 +79,69 @@ def main():
         recorder.start()
         print('Listening... (press Ctrl+C to stop)')
 
+        # capture the next frame on a separate thread while the current one is processed; the two-slot
+        # queue keeps the recorder at most one frame ahead of the enhancement loop. A capture failure is
+        # passed through the queue so the consumer re-raises it instead of waiting on a dead producer.
+        frames = queue.Queue(maxsize=2)
+        stop_event = threading.Event()
+
+        def record() -> None:
+            while not stop_event.is_set():
+                try:
+                    frames.put(np.asarray(recorder.read(), dtype=np.int16))
+                except Exception as e:
+                    if not stop_event.is_set():
+                        frames.put(e)
+                    break
+
+        recording_thread = threading.Thread(target=record, daemon=True)
+        recording_thread.start()
+
         try:
             with contextlib.ExitStack() as file_stack:
-                output_file = file_stack.enter_context(wave.open(args.output_path, 'wb'))
+                output_stream = file_stack.enter_context(open(args.output_path, 'wb', buffering=1 << 20))
+                output_file = file_stack.enter_context(wave.open(output_stream, 'wb'))
                 output_file.setnchannels(1)
                 output_file.setsampwidth(2)
                 output_file.setframerate(koala.sample_rate)
 
                 reference_file = None
                 if args.reference_output_path is not None:
-                    reference_file = file_stack.enter_context(wave.open(args.reference_output_path, 'wb'))
+                    reference_stream = file_stack.enter_context(
+                        open(args.reference_output_path, 'wb', buffering=1 << 20))
+                    reference_file = file_stack.enter_context(wave.open(reference_stream, 'wb'))
                     reference_file.setnchannels(1)
                     reference_file.setsampwidth(2)
                     reference_file.setframerate(koala.sample_rate)
 
+                vu_denominator = koala.frame_length * 32768.0 ** 2
+
+                frame_count = 0
                 while True:
-                    input_frame = recorder.read()
+                    input_frame = frames.get()
+                    if isinstance(input_frame, Exception):
+                        raise input_frame
                     if reference_file is not None:
-                        reference_file.writeframes(struct.pack('%dh' % len(input_frame), *input_frame))
-
-                    enhanced_frame = koala.process(input_frame)
-                    output_file.writeframes(struct.pack('%dh' % len(enhanced_frame), *enhanced_frame))
-                    length_sec += koala.frame_length / koala.sample_rate
-
-                    input_volume = sum((x / 32768.0) ** 2 for x in input_frame) / koala.frame_length
-                    input_volume = max(min(1 + 10 * math.log10(input_volume + 1e-10) / VU_DYNAMIC_RANGE_DB, 1), 0)
-                    bar_length = int(input_volume * VU_MAX_BAR_LENGTH)
-                    print(
-                        '\r[%3d%%]%s%s|' % (
-                            input_volume * 100,
-                            '#' * bar_length,
-                            ' ' * (VU_MAX_BAR_LENGTH - bar_length)),
-                        end='',
-                        flush=True)
+                        reference_file.writeframesraw(input_frame.tobytes())
+
+                    enhanced_frame = np.asarray(koala.process(input_frame), dtype=np.int16)
+                    output_file.writeframesraw(enhanced_frame.tobytes())
+                    num_samples_written += koala.frame_length
+
+                    frame_count += 1
+                    if frame_count % VU_UPDATE_INTERVAL_FRAMES == 0:
+                        samples = input_frame.astype(np.int64)
+                        input_volume = int(np.dot(samples, samples)) / vu_denominator
+                        input_volume = 1.0 + math.log(input_volume + 1e-10) * VU_LOG_SCALE
+                        input_volume = 0.0 if input_volume < 0.0 else 1.0 if input_volume > 1.0 else input_volume
+                        bar_length = int(input_volume * VU_MAX_BAR_LENGTH)
+                        print(
+                            '\r[%3d%%]%s|' % (input_volume * 100, VU_BARS[bar_length]),
+                            end='',
+                            flush=True)
 
         finally:
+            stop_event.set()
             recorder.stop()
 
     except KeyboardInterrupt:
@@ -115,8 +149,9 @@ def main():
     except KoalaActivationLimitError:
         print('AccessKey has reached its processing limit.')
     finally:
-        if length_sec > 0:
-            print('%.2f seconds of audio have been written to %s.' % (length_sec, args.output_path))
+        if num_samples_written > 0:
+            print('%.2f seconds of audio have been written to %s.' % (
+                num_samples_written / koala.sample_rate, args.output_path))
             if args.reference_output_path is not None:
                 print('Recorded reference has been written to %s.' % args.reference_output_path)
 
@@ -6,7 +6,12 @@ import setuptools
 
 INCLUDE_FILES = ('../../LICENSE', 'koala_demo_file.py', 'koala_demo_mic.py')
 
-os.system('git clean -dfx')
+for artifact in ('pvkoalademo', 'build', 'dist', 'pvkoalademo.egg-info', 'MANIFEST.in'):
+    artifact_path = os.path.join(os.path.dirname(__file__), artifact)
+    if os.path.isdir(artifact_path):
+        shutil.rmtree(artifact_path)
+    elif os.path.exists(artifact_path):
+        os.remove(artifact_path)
 
 package_folder = os.path.join(os.path.dirname(__file__), 'pvkoalademo')
 os.mkdir(package_folder)
@@ -32,7 +37,7 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/Picovoice/koala",
     packages=["pvkoalademo"],
-    install_requires=["pvkoala==2.0.2", "pvrecorder==1.2.2"],
+    install_requires=["numpy", "pvkoala==2.0.2", "pvrecorder==1.2.2"],
     include_package_data=True,
     classifiers=[
         "Development Status :: 5 - Production/Stable",